@@ -18,17 +18,22 @@ class Logger:
         )
         self.logger = logging.getLogger(__name__)
     
-    def info(self, msg): 
-        self.logger.info(msg)
+    def isEnabledFor(self, level) -> bool:
+        """檢查指定等級是否會輸出，可在組裝昂貴訊息前先行判斷"""
+        return self.logger.isEnabledFor(level)
     
-    def warning(self, msg): 
-        self.logger.warning(msg)
+    # 額外參數轉交logging：支援 "%s" 延遲格式化與 exc_info 等關鍵字
+    def info(self, msg, *args, **kwargs): 
+        self.logger.info(msg, *args, **kwargs)
     
-    def error(self, msg): 
-        self.logger.error(msg)
+    def warning(self, msg, *args, **kwargs): 
+        self.logger.warning(msg, *args, **kwargs)
     
-    def critical(self, msg): 
-        self.logger.critical(msg)
+    def error(self, msg, *args, **kwargs): 
+        self.logger.error(msg, *args, **kwargs)
+    
+    def critical(self, msg, *args, **kwargs): 
+        self.logger.critical(msg, *args, **kwargs)
 
 
 # 全局日誌實例
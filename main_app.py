@@ -9,7 +9,7 @@ import math
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import tkintermapview
-from typing import List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 
 from config import Config, FlightDynamics, FlightParameters
 from logger_utils import logger
@@ -90,7 +90,7 @@ class DronePathPlannerApp(tk.Tk):
         """初始化變數"""
         self.corners: List[Tuple[float, float]] = []
         self.markers: List = []
-        self.paths: List = []
+        self.paths: Dict[int, Any] = {}  # id(地圖物件) -> 地圖物件，O(1)成員查詢與刪除
         self.region_overlays: List = []
         self.start_markers: List = []  # 起點標記
         self.end_markers: List = []    # 終點標記
@@ -420,6 +420,8 @@ class DronePathPlannerApp(tk.Tk):
             if hasattr(self, 'map_manager'):
                 self.map_manager.initialize_map()
                 self.map.add_left_click_map_command(self.on_map_click)
+                if self.obstacle_ui_extension:
+                    self.obstacle_ui_extension.cull_offscreen_obstacles()
                 logger.info("地圖初始化完成")
                 
                 # 在地圖初始化後，添加障礙物UI到控制面板
@@ -447,6 +449,9 @@ class DronePathPlannerApp(tk.Tk):
         try:
             if hasattr(self, 'map_manager'):
                 self.map_manager.switch_map_server(index)
+                if self.obstacle_ui_extension:
+                    # 切換瓦片伺服器可能限制縮放等級而移動地圖
+                    self.obstacle_ui_extension.cull_offscreen_obstacles()
         except Exception as e:
             logger.error(f"切換地圖伺服器失敗: {e}")
     
@@ -532,7 +537,7 @@ class DronePathPlannerApp(tk.Tk):
                 color="#FFFFFF", 
                 width=2
             )
-            self.paths.append(boundary_path)
+            self.paths[id(boundary_path)] = boundary_path
             
             # 切換到編輯模式
             self.mode_var.set("Edit")
@@ -808,7 +813,7 @@ class DronePathPlannerApp(tk.Tk):
                     color=color,
                     width=path_width
                 )
-                self.paths.append(path)
+                self.paths[id(path)] = path
                 
         except Exception as e:
             logger.error(f"繪製飛行路徑失敗: {e}")
@@ -927,7 +932,7 @@ class DronePathPlannerApp(tk.Tk):
     def clear_paths(self):
         """清除路徑"""
         try:
-            for path in self.paths:
+            for path in self.paths.values():
                 try:
                     path.delete()
                 except Exception:
@@ -18,6 +18,8 @@ class MapManager:
     def __init__(self, map_widget):
         self.map = map_widget
         self.current_server = 0
+        self._servers = tuple(Config.MAP_SERVERS)  # 伺服器清單於建立時綁定
+        self._current_tile = None  # 目前套用的 (url, max_zoom)
         
     def initialize_map(self):
         """初始化地圖"""
@@ -26,10 +28,10 @@ class MapManager:
             success = False
 
             # 嘗試載入地圖伺服器
-            for i, (name, url, max_zoom) in enumerate(Config.MAP_SERVERS):
+            for i, (name, url, max_zoom) in enumerate(self._servers):
                 try:
                     logger.info(f"嘗試載入地圖伺服器: {name}")
-                    self.map.set_tile_server(url, max_zoom=max_zoom)
+                    self._set_tile_server(url, max_zoom)
                     self.current_server = i
                     logger.info(f"成功載入地圖伺服器: {name}")
                     success = True
@@ -41,7 +43,7 @@ class MapManager:
             if not success:
                 logger.error("所有地圖伺服器載入失敗，使用預設瓦片")
                 # 使用預設的OpenStreetMap
-                self.map.set_tile_server("https://tile.openstreetmap.org/{z}/{x}/{y}.png", max_zoom=19)
+                self._set_tile_server("https://tile.openstreetmap.org/{z}/{x}/{y}.png", 19)
 
             # 設定預設位置
             self.map.set_position(*Config.DEFAULT_POSITION)
@@ -54,10 +56,17 @@ class MapManager:
     def switch_map_server(self, server_index: int):
         """切換地圖伺服器"""
         try:
-            if 0 <= server_index < len(Config.MAP_SERVERS):
-                name, url, max_zoom = Config.MAP_SERVERS[server_index]
-                self.map.set_tile_server(url, max_zoom=max_zoom)
+            if 0 <= server_index < len(self._servers):
+                name, url, max_zoom = self._servers[server_index]
+                self._set_tile_server(url, max_zoom)
                 self.current_server = server_index
                 logger.info(f"切換到地圖伺服器: {name}")
         except Exception as e:
-            logger.error(f"切換地圖伺服器失敗: {e}")
\ No newline at end of file
+            logger.error(f"切換地圖伺服器失敗: {e}")
+    
+    def _set_tile_server(self, url: str, max_zoom: int):
+        """設定瓦片伺服器；與目前相同時略過，避免重新載入瓦片"""
+        if self._current_tile == (url, max_zoom):
+            return
+        self.map.set_tile_server(url, max_zoom=max_zoom)
+        self._current_tile = (url, max_zoom)
\ No newline at end of file
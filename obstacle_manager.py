@@ -3,9 +3,26 @@
 實現方案一：網格線智能分段避障，最大化偵察覆蓋率
 """
 
+import logging
 import math
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
+
+import numpy as np
+
 from logger_utils import logger
+from obstacle_math import NUMBA_AVAILABLE, njit
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    # scipy為可選依賴：未安裝時最近障礙物查詢以NumPy向量化argmin計算
+    cKDTree = None
+
+try:
+    from _geom import batch_line_circle_hit
+except ImportError:
+    # C擴展（_geom.pyx）未編譯時使用NumPy向量化版本
+    batch_line_circle_hit = None
 
 try:
     from config import Config
@@ -13,20 +30,158 @@ except ImportError:
     class Config:
         EARTH_RADIUS_M = 6378137.0
 
+
+def _project(lat: float, lon: float, cx: float, cy: float,
+             r_lon: float, r_lat: float) -> Tuple[float, float]:
+    """
+    等距圓柱投影：經緯度 -> 以(cx, cy)為原點的公尺座標
+    
+    與waypoint_generator.py的project_and_rotate一致；
+    r_lon = 每度公尺數 × cos(中心緯度)，r_lat = 每度公尺數，由呼叫端預先計算
+    """
+    return (lon - cy) * r_lon, (lat - cx) * r_lat
+
+
+def _unproject(x: float, y: float, cx: float, cy: float,
+               r_lon: float, r_lat: float) -> Tuple[float, float]:
+    """_project的反轉換：公尺座標 -> 經緯度"""
+    return y / r_lat + cx, x / r_lon + cy
+
+
+# ==============================
+# 幾何核心函數
+# 單次呼叫的純量函數維持純Python（numba逐次呼叫的分派成本高於計算本身），
+# 只有批次迴圈以numba JIT編譯
+# ==============================
+def _planar_distance(lat1, lon1, lat2, lon2, m_per_deg):
+    """兩點間平面近似距離（公尺），經度以平均緯度縮放"""
+    cos_lat = math.cos(math.radians((lat1 + lat2) / 2))
+    dy = (lat2 - lat1) * m_per_deg
+    dx = (lon2 - lon1) * m_per_deg * cos_lat
+    return math.hypot(dx, dy)
+
+
+def _planar_distance_sq(lat1, lon1, lat2, lon2, m_per_deg):
+    """兩點間平面近似距離的平方（公尺²），僅比較大小時可省去開根號"""
+    cos_lat = math.cos(math.radians((lat1 + lat2) / 2))
+    dy = (lat2 - lat1) * m_per_deg
+    dx = (lon2 - lon1) * m_per_deg * cos_lat
+    return dx * dx + dy * dy
+
+
+def _line_circle_hit(x1, y1, x2, y2, r):
+    """公尺座標下，線段是否與以原點為圓心、半徑r的圓相交"""
+    dx = x2 - x1
+    dy = y2 - y1
+    dr2 = dx * dx + dy * dy
+    
+    if dr2 == 0:
+        # 線段退化為點
+        return (x1 * x1 + y1 * y1) <= r * r
+    
+    # 計算圓心到線段的最短距離
+    t = -(x1 * dx + y1 * dy) / dr2
+    t = max(0.0, min(1.0, t))  # 限制在線段上
+    
+    closest_x = x1 + t * dx
+    closest_y = y1 + t * dy
+    return closest_x * closest_x + closest_y * closest_y < r * r
+
+
+def _intersect_line_circle_meters(x1, y1, x2, y2, r):
+    """
+    公尺座標下，直線 P(t) = P1 + t(P2 - P1) 與原點圓的交點參數
+    
+    返回: (是否有解, t1, t2)，t1 <= t2
+    """
+    dx = x2 - x1
+    dy = y2 - y1
+    
+    # 代入圓方程，得到二次方程 at² + bt + c = 0
+    a = dx * dx + dy * dy
+    b = 2 * (dx * x1 + dy * y1)
+    c = x1 * x1 + y1 * y1 - r * r
+    
+    discriminant = b * b - 4 * a * c
+    if discriminant < 0 or a == 0:
+        return False, 0.0, 0.0
+    
+    sqrt_disc = math.sqrt(discriminant)
+    return True, (-b - sqrt_disc) / (2 * a), (-b + sqrt_disc) / (2 * a)
+
+
+# 供JIT批次迴圈內部呼叫的編譯版本
+_line_circle_hit_jit = njit(cache=True, fastmath=True)(_line_circle_hit)
+
+
+@njit(cache=True, fastmath=True)
+def _segment_hit_kernel(seg_lat1, seg_lon1, seg_lat2, seg_lon2,
+                        obs_lat, obs_lon, obs_r, obs_r_lon, r_lat, out):
+    """
+    線段×障礙物碰撞矩陣（SoA輸入），先以外接矩形提前排除再做完整距離檢測
+    
+    結果寫入out (S, M)，語意與ObstacleManager._segment_hit_matrix相同
+    """
+    for i in range(seg_lat1.shape[0]):
+        for j in range(obs_lat.shape[0]):
+            r = obs_r[j]
+            # 以障礙物中心為原點投影為公尺座標
+            x1 = (seg_lon1[i] - obs_lon[j]) * obs_r_lon[j]
+            x2 = (seg_lon2[i] - obs_lon[j]) * obs_r_lon[j]
+            if min(x1, x2) > r or max(x1, x2) < -r:
+                continue
+            y1 = (seg_lat1[i] - obs_lat[j]) * r_lat
+            y2 = (seg_lat2[i] - obs_lat[j]) * r_lat
+            if min(y1, y2) > r or max(y1, y2) < -r:
+                continue
+            out[i, j] = _line_circle_hit_jit(x1, y1, x2, y2, r)
+    return out
+
 class Obstacle:
     """障礙物資料類"""
+    __slots__ = ('center', '_radius', '_safe_distance', 'effective_radius', '_r2', '_cos_lat',
+                 '_inv_coslat', 'marker', 'circle', 'safe_circle', '_aabb')
+    
     def __init__(self, center: Tuple[float, float], radius: float, safe_distance: float = 1.0):
-        self.center = center  # (lat, lon)
-        self.radius = radius  # 公尺
-        self.safe_distance = safe_distance  # 安全距離（公尺）
+        self.center = center  # (lat, lon)，建立後不變
+        self._radius = radius  # 公尺
+        self._safe_distance = safe_distance  # 安全距離（公尺）
         self.marker = None  # 地圖標記
-        self.circle = None  # 圓形顯示
-        self.safe_circle = None # 安全範圍顯示
-        
+        self.circle = None  # 圓形顯示（障礙物本體）
+        self.safe_circle = None  # 安全範圍顯示
+        self._cos_lat = math.cos(math.radians(center[0]))  # 中心緯度的經度縮放係數
+        self._inv_coslat = 1.0 / self._cos_lat  # 公尺轉經度時的縮放係數（繪製圓周用）
+        self.effective_radius = 0.0  # 有效半徑 = 障礙物半徑 + 安全距離（快取）
+        self._r2 = 0.0  # 有效半徑平方（快取）
+        self._aabb = (0.0, 0.0, 0.0, 0.0)  # 有效範圍外接矩形 (lat_min, lat_max, lon_min, lon_max)
+        self._update_derived()
+    
+    @property
+    def radius(self) -> float:
+        return self._radius
+    
+    @radius.setter
+    def radius(self, value: float):
+        self._radius = value
+        self._update_derived()
+    
     @property
-    def effective_radius(self):
-        """有效半徑 = 障礙物半徑 + 安全距離"""
-        return self.radius + self.safe_distance
+    def safe_distance(self) -> float:
+        return self._safe_distance
+    
+    @safe_distance.setter
+    def safe_distance(self, value: float):
+        self._safe_distance = value
+        self._update_derived()
+    
+    def _update_derived(self):
+        """重新計算有效半徑與經緯度外接矩形（尺寸變更時自動呼叫）"""
+        self.effective_radius = self._radius + self._safe_distance
+        self._r2 = self.effective_radius * self.effective_radius
+        lat, lon = self.center
+        dlat = self.effective_radius / 111111.0
+        dlon = dlat / self._cos_lat
+        self._aabb = (lat - dlat, lat + dlat, lon - dlon, lon + dlon)
 
 
 class ObstacleManager:
@@ -44,46 +199,116 @@ class ObstacleManager:
         self.obstacles: List[Obstacle] = []
         self.earth_radius_m = 111111.0  # 每度約111111公尺
         
+        # 障礙物索引（障礙物增刪或尺寸變更時標記失效，查詢時延遲重建）
+        self._index_dirty = True
+        
+        # SoA陣列：與obstacles同序的平行NumPy陣列，供批次碰撞檢測直接讀取
+        self._obs_arr: Dict[str, np.ndarray] = {}
+        
+        # KD樹（公尺平面座標），供最近障礙物查詢；索引重建時失效，使用時才建立
+        self._tree = None
+        self._tree_m_per_deg_lon = 0.0
+        
     def add_obstacle(self, center: Tuple[float, float], radius: float, 
                     safe_distance: float = 1.0) -> Obstacle:
         """添加障礙物"""
         obstacle = Obstacle(center, radius, safe_distance)
         self.obstacles.append(obstacle)
-        logger.info(f"添加障礙物：中心{center}, 半徑{radius}m, 安全距離{safe_distance}m")
+        self._index_dirty = True
+        logger.info("添加障礙物：中心%s, 半徑%sm, 安全距離%sm", center, radius, safe_distance)
         return obstacle
     
+    def update_obstacle(self, obstacle: Obstacle, radius: Optional[float] = None,
+                        safe_distance: Optional[float] = None):
+        """更新障礙物尺寸（同步使空間索引失效）"""
+        if radius is not None:
+            obstacle.radius = radius
+        if safe_distance is not None:
+            obstacle.safe_distance = safe_distance
+        self._index_dirty = True
+    
     def remove_obstacle(self, obstacle: Obstacle):
         """移除障礙物"""
         if obstacle in self.obstacles:
             self.obstacles.remove(obstacle)
-            logger.info(f"移除障礙物：{obstacle.center}")
+            self._index_dirty = True
+            logger.info("移除障礙物：%s", obstacle.center)
             return True
         return False
 
     def remove_nearest_obstacle(self, coords: Tuple[float, float], threshold_m: float = 50.0):
-        """移除指定座標最近的障礙物"""
+        """移除指定座標最近的障礙物（距離超過threshold_m時不移除）"""
         if not self.obstacles:
             return None
-            
-        nearest_obs = None
-        min_dist = float('inf')
-        
-        for obs in self.obstacles:
-            dist = self.calculate_distance(coords, obs.center)
-            if dist < min_dist:
-                min_dist = dist
-                nearest_obs = obs
-                
-        if nearest_obs:
+        
+        if cKDTree is not None:
+            nearest_obs, min_dist_sq = self._nearest_kdtree(coords)
+        else:
+            nearest_obs, min_dist_sq = self._nearest_vectorized(coords)
+        
+        if nearest_obs and min_dist_sq <= threshold_m * threshold_m:
             self.remove_obstacle(nearest_obs)
             return nearest_obs
         return None
     
+    def _nearest_kdtree(self, coords: Tuple[float, float]) -> Tuple[Optional[Obstacle], float]:
+        """以KD樹查詢最近障礙物，返回 (障礙物, 距離平方)"""
+        self._ensure_index()
+        arr = self._obs_arr
+        if self._tree is None:
+            # 以障礙物平均緯度的經度縮放投影為公尺平面，使樹上距離即為公尺
+            self._tree_m_per_deg_lon = self.earth_radius_m * math.cos(
+                math.radians(float(arr['centers_lat'].mean())))
+            self._tree = cKDTree(np.column_stack((arr['centers_lat'] * self.earth_radius_m,
+                                                  arr['centers_lon'] * self._tree_m_per_deg_lon)))
+        
+        _, idx = self._tree.query((coords[0] * self.earth_radius_m,
+                                   coords[1] * self._tree_m_per_deg_lon))
+        nearest_obs = self.obstacles[int(idx)]
+        return nearest_obs, self._distance_sq_m2(coords, nearest_obs.center)
+    
+    def _nearest_vectorized(self, coords: Tuple[float, float]) -> Tuple[Optional[Obstacle], float]:
+        """對SoA中心陣列一次計算所有距離平方並取argmin，返回 (障礙物, 距離平方)"""
+        self._ensure_index()
+        arr = self._obs_arr
+        lat, lon = coords
+        centers_lat = arr['centers_lat']
+        
+        # 與_planar_distance_sq相同的平面近似（經度以平均緯度縮放）
+        cos_lat = np.cos(np.radians((centers_lat + lat) / 2))
+        dy = (centers_lat - lat) * self.earth_radius_m
+        dx = (arr['centers_lon'] - lon) * self.earth_radius_m * cos_lat
+        dist_sq = dx * dx + dy * dy
+        
+        i = int(dist_sq.argmin())
+        return self.obstacles[i], float(dist_sq[i])
+    
     def clear_all(self):
         """清除所有障礙物"""
         self.obstacles.clear()
+        self._index_dirty = True
         logger.info("清除所有障礙物")
-
+    
+    def _ensure_index(self):
+        """索引失效時重建SoA陣列，並使KD樹失效"""
+        if not self._index_dirty:
+            return
+        self._rebuild_arrays()
+        self._tree = None
+        self._index_dirty = False
+    
+    def _rebuild_arrays(self):
+        """重建障礙物SoA陣列（中心、有效半徑、投影係數）"""
+        obstacles = self.obstacles
+        cos_lats = np.array([o._cos_lat for o in obstacles], dtype=np.float64)
+        self._obs_arr = {
+            'centers_lat': np.array([o.center[0] for o in obstacles], dtype=np.float64),
+            'centers_lon': np.array([o.center[1] for o in obstacles], dtype=np.float64),
+            'r_eff': np.array([o.effective_radius for o in obstacles], dtype=np.float64),
+            'cos_lats': cos_lats,
+            'r_lon': self.earth_radius_m * cos_lats,  # 每度經度公尺數
+        }
+    
     def filter_waypoints_with_detour(self, waypoints: List[Tuple[float, float]], 
                                      boundary_corners: List[Tuple[float, float]] = None) -> List[Tuple[float, float]]:
         """
@@ -101,8 +326,17 @@ class ObstacleManager:
         # 識別掃描線段結構
         scan_segments = self._identify_scan_segments(waypoints)
         
+        # 一次性批次計算所有掃描線與所有障礙物的碰撞矩陣
+        waypoints_np = np.asarray(waypoints, dtype=np.float64)
+        scan_pairs = np.array([indices for seg_type, indices in scan_segments if seg_type == "scan"],
+                              dtype=np.intp).reshape(-1, 2)
+        hit_matrix = self._segment_hit_matrix(waypoints_np[scan_pairs[:, 0]],
+                                              waypoints_np[scan_pairs[:, 1]])
+        scan_row = 0
+        
         result_waypoints = []
-        processed_indices = set()
+        seen_waypoints = set()  # result_waypoints的雜湊索引，O(1)去重查詢
+        processed = bytearray(len(waypoints))  # 已處理航點索引的位元組旗標
         
         for seg_type, indices in scan_segments:
             if seg_type == "scan":
@@ -111,42 +345,48 @@ class ObstacleManager:
                 p1 = waypoints[start_idx]
                 p2 = waypoints[end_idx]
                 
-                # 檢查是否穿過障礙物
-                colliding_obstacles = self.check_segment_collision(p1, p2)
+                # 檢查是否穿過障礙物（查詢預先計算的碰撞矩陣）
+                colliding_obstacles = [self.obstacles[j] for j in np.flatnonzero(hit_matrix[scan_row])]
+                scan_row += 1
                 
                 if not colliding_obstacles:
                     # 無障礙物，正常添加掃描線兩端點
-                    if start_idx not in processed_indices:
+                    if not processed[start_idx]:
                         result_waypoints.append(p1)
-                        processed_indices.add(start_idx)
-                    if end_idx not in processed_indices:
+                        seen_waypoints.add(p1)
+                        processed[start_idx] = 1
+                    if not processed[end_idx]:
                         result_waypoints.append(p2)
-                        processed_indices.add(end_idx)
+                        seen_waypoints.add(p2)
+                        processed[end_idx] = 1
                 else:
                     # 有障礙物，智能分段處理
                     segmented_waypoints = self._segment_scan_line(p1, p2, colliding_obstacles, boundary_corners)
                     
                     # 添加分段後的航點（去重）
                     for wp in segmented_waypoints:
-                        if wp not in result_waypoints:
+                        if wp not in seen_waypoints:
                             result_waypoints.append(wp)
+                            seen_waypoints.add(wp)
                     
-                    processed_indices.add(start_idx)
-                    processed_indices.add(end_idx)
-                    logger.info(f"掃描線 {start_idx}-{end_idx} 穿過障礙物，已分段處理，生成{len(segmented_waypoints)}個航點")
+                    processed[start_idx] = 1
+                    processed[end_idx] = 1
+                    logger.info("掃描線 %d-%d 穿過障礙物，已分段處理，生成%d個航點",
+                                start_idx, end_idx, len(segmented_waypoints))
             
             elif seg_type == "turn":
                 # 轉向段，直接添加未處理的點
                 for idx in indices:
-                    if idx not in processed_indices:
+                    if not processed[idx]:
                         result_waypoints.append(waypoints[idx])
-                        processed_indices.add(idx)
+                        seen_waypoints.add(waypoints[idx])
+                        processed[idx] = 1
         
         # 確保所有未處理的點都被添加
         for i, wp in enumerate(waypoints):
-            if i not in processed_indices:
+            if not processed[i]:
                 result_waypoints.append(wp)
-                processed_indices.add(i)
+                processed[i] = 1
         
         return result_waypoints
     
@@ -164,34 +404,29 @@ class ObstacleManager:
         if len(waypoints) < 2:
             return []
         
-        segments = []
-        
-        # 計算所有相鄰點之間的距離
-        distances = []
-        for i in range(len(waypoints) - 1):
-            dist = self.calculate_distance(waypoints[i], waypoints[i + 1])
-            distances.append((i, i + 1, dist))
-        
-        if not distances:
-            return []
+        # 一次向量化計算所有相鄰點之間的距離（與calculate_distance相同的平面近似）
+        wp = np.asarray(waypoints, dtype=np.float64)
+        dlat = np.diff(wp[:, 0])
+        dlon = np.diff(wp[:, 1])
+        cos_avg_lat = np.cos(np.radians((wp[:-1, 0] + wp[1:, 0]) * 0.5))
+        dists = np.hypot(dlon * cos_avg_lat, dlat) * self.earth_radius_m
         
-        # 找出距離中位數作為閾值
-        sorted_dists = sorted([d[2] for d in distances])
-        median_dist = sorted_dists[len(sorted_dists) // 2]
-        max_dist = sorted_dists[-1]
+        # 找出距離中位數作為閾值（np.partition為O(N)選擇，無需完整排序）
+        mid = len(dists) // 2
+        median_dist = np.partition(dists, mid)[mid]
+        max_dist = dists.max()
         
         # 閾值：使用最大距離的50%，確保只識別真正的長掃描線
         # 避免將短距離誤判為掃描線
         threshold = max(median_dist * 0.6, max_dist * 0.5)
         
         # 識別掃描線段
-        for idx_start, idx_end, dist in distances:
-            if dist > threshold:
-                segments.append(("scan", (idx_start, idx_end)))
-            else:
-                segments.append(("turn", (idx_start, idx_end)))
+        is_scan = dists > threshold
+        segments = [("scan" if scan else "turn", (i, i + 1))
+                    for i, scan in enumerate(is_scan.tolist())]
+        scan_count = int(np.count_nonzero(is_scan))
         
-        logger.info(f"識別掃描結構：{len([s for s in segments if s[0]=='scan'])}條掃描線，閾值={threshold:.2f}m")
+        logger.info("識別掃描結構：%d條掃描線，閾值=%.2fm", scan_count, threshold)
         return segments
     
     def _segment_scan_line(self, p1: Tuple[float, float], p2: Tuple[float, float],
@@ -201,9 +436,10 @@ class ObstacleManager:
         將穿過障礙物的掃描線分段（遞歸處理多個障礙物）
 
         策略：
-        1. 計算掃描線與障礙物的交點
+        1. 取中心最接近起點的障礙物，計算掃描線與其交點
         2. 生成繞行路徑（沿著障礙物安全邊界）
-        3. 遞歸處理剩餘的障礙物
+        3. 以繞行後的每一段（含離開點到終點）遞歸處理剩餘障礙物，
+           下一個障礙物的繞行由前一個繞行的離開點起算
         4. 返回: [p1, 繞行點們..., p2]
 
         返回: 分段後的航點列表
@@ -212,74 +448,18 @@ class ObstacleManager:
             return [p1, p2]
 
         # 找到最接近起點的障礙物
-        closest_obstacle = None
-        min_dist_to_start = float('inf')
-
-        for obs in obstacles:
-            # 計算障礙物中心到起點的距離
-            dist = self.calculate_distance(p1, obs.center)
-            if dist < min_dist_to_start:
-                min_dist_to_start = dist
-                closest_obstacle = obs
-
-        if closest_obstacle is None:
-            return [p1, p2]
-
-        # 計算線段與最近障礙物的交點
-        intersection_points = self._calculate_line_circle_intersection(p1, p2, closest_obstacle)
-
-        if len(intersection_points) < 2:
-            # 沒有足夠的交點，嘗試處理其他障礙物
-            remaining_obstacles = [o for o in obstacles if o != closest_obstacle]
-            if remaining_obstacles:
-                return self._segment_scan_line(p1, p2, remaining_obstacles, boundary_corners)
-            return [p1, p2]
-
-        # 生成繞行路徑（沿著障礙物安全邊界的切線）
-        detour_points = self._generate_tangent_detour(p1, p2, closest_obstacle,
-                                                      intersection_points[0], intersection_points[1])
-
-        if not detour_points:
-            logger.warning(f"繞行點生成失敗，掃描線長度可能太短")
-            # 嘗試處理其他障礙物
-            remaining_obstacles = [o for o in obstacles if o != closest_obstacle]
-            if remaining_obstacles:
-                return self._segment_scan_line(p1, p2, remaining_obstacles, boundary_corners)
-            return [p1, p2]
-
-        # 驗證繞行點是否在邊界內
-        valid_detour = []
-        for i, dp in enumerate(detour_points):
-            if boundary_corners is None:
-                valid_detour.append(dp)
-            elif self.point_in_polygon(dp, boundary_corners):
-                valid_detour.append(dp)
-            else:
-                logger.warning(f"繞行點{i+1}: ({dp[0]:.6f}, {dp[1]:.6f}) 超出邊界")
-                # 使用備用策略：直接在線段上選點
-                if i == 0:  # 進入點：在30%位置
-                    fallback = self._interpolate_point(p1, p2, 0.30)
-                else:  # 離開點：在70%位置
-                    fallback = self._interpolate_point(p1, p2, 0.70)
+        first = min(obstacles, key=lambda o: self._distance_sq_m2(p1, o.center))
+        remaining_obstacles = [o for o in obstacles if o is not first]
 
-                if self.point_in_polygon(fallback, boundary_corners):
-                    valid_detour.append(fallback)
-
-        if not valid_detour:
-            logger.warning(f"無法生成有效繞行路徑")
-            # 嘗試處理其他障礙物
-            remaining_obstacles = [o for o in obstacles if o != closest_obstacle]
-            if remaining_obstacles:
-                return self._segment_scan_line(p1, p2, remaining_obstacles, boundary_corners)
-            return [p1, p2]
+        detour = self._obstacle_detour(p1, p2, first, boundary_corners)
+        if not detour:
+            # 此障礙物無法繞行，嘗試處理其他障礙物
+            return self._segment_scan_line(p1, p2, remaining_obstacles, boundary_corners)
 
         # 構建當前障礙物的繞行路徑
-        current_path = [p1] + valid_detour + [p2]
-
-        # 檢查是否還有其他障礙物需要處理
-        remaining_obstacles = [o for o in obstacles if o != closest_obstacle]
+        current_path = [p1] + detour + [p2]
         if not remaining_obstacles:
-            logger.info(f"成功生成繞行路徑: {len(valid_detour)}個繞行點")
+            logger.info("成功生成繞行路徑: %d個繞行點", len(detour))
             return current_path
 
         # 遞歸處理剩餘障礙物：檢查每個線段是否與其他障礙物碰撞
@@ -288,7 +468,7 @@ class ObstacleManager:
             seg_start = current_path[i]
             seg_end = current_path[i + 1]
 
-            # 檢查這個線段是否與剩餘障礙物碰撞
+            # 檢查這個線段是否與剩餘障礙物碰撞（含離開點到終點的連接段）
             colliding = []
             for obs in remaining_obstacles:
                 if self.line_intersects_circle(seg_start, seg_end, obs.center, obs.effective_radius):
@@ -303,12 +483,62 @@ class ObstacleManager:
                 # 無碰撞，直接添加終點
                 final_path.append(seg_end)
 
-        logger.info(f"完整繞行路徑: 處理{len(obstacles)}個障礙物, 生成{len(final_path)}個航點")
+        logger.info("完整繞行路徑: 處理%d個障礙物, 生成%d個航點", len(obstacles), len(final_path))
         return final_path
+
+    def _obstacle_detour(self, p1: Tuple[float, float], p2: Tuple[float, float],
+                         obstacle: Obstacle,
+                         boundary_corners: Optional[List[Tuple[float, float]]]) -> List[Tuple[float, float]]:
+        """
+        為單一障礙物生成經邊界驗證的繞行點
+
+        超出邊界的繞行點改用線段上30%/70%位置的備用點
+
+        返回: 繞行點列表，失敗時為空列表
+        """
+        # 計算線段與障礙物的交點
+        intersection_points, intersection_m, segment_m = self._calculate_line_circle_intersection(
+            p1, p2, obstacle)
+
+        if len(intersection_points) < 2:
+            return []
+
+        # 生成繞行路徑（沿著障礙物安全邊界的切線）
+        detour_points = self._generate_tangent_detour(obstacle, segment_m,
+                                                      intersection_m[0], intersection_m[1])
+
+        if not detour_points:
+            logger.warning("繞行點生成失敗，掃描線長度可能太短")
+            return []
+
+        # 驗證繞行點是否在邊界內（批次判斷）
+        if boundary_corners is None:
+            inside_flags = [True] * len(detour_points)
+        else:
+            inside_flags = self.point_in_polygon_batch(detour_points, boundary_corners).tolist()
+        
+        valid_detour = []
+        for i, dp in enumerate(detour_points):
+            if inside_flags[i]:
+                valid_detour.append(dp)
+            else:
+                logger.warning("繞行點%d: (%.6f, %.6f) 超出邊界", i + 1, dp[0], dp[1])
+                # 使用備用策略：直接在線段上選點
+                if i == 0:  # 進入點：在30%位置
+                    fallback = self._interpolate_point(p1, p2, 0.30)
+                else:  # 離開點：在70%位置
+                    fallback = self._interpolate_point(p1, p2, 0.70)
+
+                if self.point_in_polygon(fallback, boundary_corners):
+                    valid_detour.append(fallback)
+
+        if not valid_detour:
+            logger.warning("無法生成有效繞行路徑")
+        return valid_detour
     
     def _calculate_line_circle_intersection(self, p1: Tuple[float, float], 
                                            p2: Tuple[float, float],
-                                           obstacle: Obstacle) -> List[Tuple[float, float]]:
+                                           obstacle: Obstacle):
         """
         計算線段與圓形障礙物的交點
         
@@ -316,7 +546,8 @@ class ObstacleManager:
         - 線段: P(t) = P1 + t(P2 - P1), t ∈ [0, 1]
         - 圓: (x - cx)² + (y - cy)² = r²
         
-        返回: 交點列表（地理座標）
+        返回: (交點列表（地理座標）, 交點列表（以障礙物中心為原點的公尺座標）,
+               線段端點公尺座標 (x1, y1, x2, y2))，供_generate_tangent_detour直接沿用
         """
         lat1, lon1 = p1
         lat2, lon2 = p2
@@ -324,53 +555,39 @@ class ObstacleManager:
         radius = obstacle.effective_radius
         
         # 使用與waypoint_generator相同的座標轉換
-        cosLat0 = math.cos(math.radians(cx))
+        r_lat = self.earth_radius_m
+        r_lon = r_lat * obstacle._cos_lat
         
-        def to_meters(lat, lon):
-            # 與waypoint_generator.py的project_and_rotate一致
-            x = (lon - cy) * self.earth_radius_m * cosLat0
-            y = (lat - cx) * self.earth_radius_m
-            return x, y
+        x1, y1 = _project(lat1, lon1, cx, cy, r_lon, r_lat)
+        x2, y2 = _project(lat2, lon2, cx, cy, r_lon, r_lat)
         
-        def to_latlon(x, y):
-            # 與waypoint_generator.py的rotate_back_to_geographic一致
-            lat = y / self.earth_radius_m + cx
-            lon = x / (self.earth_radius_m * cosLat0) + cy
-            return lat, lon
+        segment_m = (x1, y1, x2, y2)
         
-        x1, y1 = to_meters(lat1, lon1)
-        x2, y2 = to_meters(lat2, lon2)
+        found, t1, t2 = _intersect_line_circle_meters(x1, y1, x2, y2, radius)
+        if not found:
+            return [], [], segment_m  # 無交點
         
-        # 線段參數方程
         dx = x2 - x1
         dy = y2 - y1
         
-        # 代入圓方程，得到二次方程 at² + bt + c = 0
-        a = dx * dx + dy * dy
-        b = 2 * (dx * x1 + dy * y1)
-        c = x1 * x1 + y1 * y1 - radius * radius
-        
-        discriminant = b * b - 4 * a * c
-        
-        if discriminant < 0 or a == 0:
-            return []  # 無交點
-        
-        # 計算兩個解
-        t1 = (-b - math.sqrt(discriminant)) / (2 * a)
-        t2 = (-b + math.sqrt(discriminant)) / (2 * a)
-        
         # 篩選在線段上的交點 (0 <= t <= 1)
         intersections = []
-        for t in [t1, t2]:
-            if 0 <= t <= 1:
-                x = x1 + t * dx
-                y = y1 + t * dy
-                intersections.append(to_latlon(x, y))
-        
-        return intersections
+        intersections_m = []
+        if 0 <= t1 <= 1:
+            x = x1 + t1 * dx
+            y = y1 + t1 * dy
+            intersections.append(_unproject(x, y, cx, cy, r_lon, r_lat))
+            intersections_m.append((x, y))
+        if 0 <= t2 <= 1:
+            x = x1 + t2 * dx
+            y = y1 + t2 * dy
+            intersections.append(_unproject(x, y, cx, cy, r_lon, r_lat))
+            intersections_m.append((x, y))
+        
+        return intersections, intersections_m, segment_m
     
-    def _generate_tangent_detour(self, p1: Tuple[float, float], p2: Tuple[float, float],
-                                 obstacle: Obstacle,
+    def _generate_tangent_detour(self, obstacle: Obstacle,
+                                 segment_m: Tuple[float, float, float, float],
                                  inter1: Tuple[float, float],
                                  inter2: Tuple[float, float]) -> List[Tuple[float, float]]:
         """
@@ -381,40 +598,34 @@ class ObstacleManager:
         2. 沿著安全邊界的圓周走
         3. 生成規律的圓弧路徑
 
-        返回: [進入點, 中間點們..., 離開點]
+        參數皆為_calculate_line_circle_intersection已投影的公尺座標（以障礙物中心為原點）：
+            segment_m: 線段端點 (x1, y1, x2, y2)
+            inter1, inter2: 兩個交點 (x, y)
+
+        返回: [進入點, 中間點們..., 離開點]（地理座標）
         """
         cx, cy = obstacle.center
         # 安全半徑：在effective_radius基礎上額外增加0.5米作為緩衝
         safe_radius = obstacle.effective_radius + 0.5
 
-        # 座標轉換函數
-        cosLat0 = math.cos(math.radians(cx))
+        # 座標轉換係數
+        r_lat = self.earth_radius_m
+        r_lon = r_lat * obstacle._cos_lat
 
-        def to_meters(lat, lon):
-            x = (lon - cy) * self.earth_radius_m * cosLat0
-            y = (lat - cx) * self.earth_radius_m
-            return x, y
-
-        def to_latlon(x, y):
-            lat = y / self.earth_radius_m + cx
-            lon = x / (self.earth_radius_m * cosLat0) + cy
-            return lat, lon
-
-        # 轉換到公尺座標系（以障礙物中心為原點）
-        x1, y1 = to_meters(p1[0], p1[1])
-        x2, y2 = to_meters(p2[0], p2[1])
+        # 線段已在公尺座標系（以障礙物中心為原點）
+        x1, y1, x2, y2 = segment_m
 
         # 計算線段方向
         dx = x2 - x1
         dy = y2 - y1
-        length = math.sqrt(dx * dx + dy * dy)
+        length = math.hypot(dx, dy)
 
         if length < 1.0:
             return []
 
         # 計算兩個交點對應的角度
-        xi1, yi1 = to_meters(inter1[0], inter1[1])
-        xi2, yi2 = to_meters(inter2[0], inter2[1])
+        xi1, yi1 = inter1
+        xi2, yi2 = inter2
 
         angle1 = math.atan2(yi1, xi1)
         angle2 = math.atan2(yi2, xi2)
@@ -454,21 +665,18 @@ class ObstacleManager:
         # 計算航點數量（每15度一個點）
         num_points = max(3, int(angle_diff / math.radians(15)))
 
-        # 生成沿著圓周的規律航點（從擴展的起點到擴展的終點）
-        detour_points = []
-        for i in range(num_points + 1):
-            t = i / num_points
-            angle = angle1_extended + (angle2_extended - angle1_extended) * t
-
-            # 在安全半徑上生成點
-            x = safe_radius * math.cos(angle)
-            y = safe_radius * math.sin(angle)
+        # 生成沿著圓周的規律航點（從擴展的起點到擴展的終點，一次向量化計算）
+        t = np.arange(num_points + 1) / num_points
+        angles = angle1_extended + (angle2_extended - angle1_extended) * t
 
-            point = to_latlon(x, y)
-            detour_points.append(point)
+        # 在安全半徑上生成點並轉回經緯度
+        lats, lons = _unproject(safe_radius * np.cos(angles), safe_radius * np.sin(angles),
+                                cx, cy, r_lon, r_lat)
+        detour_points = list(zip(lats.tolist(), lons.tolist()))
 
-        logger.info(f"規律繞行: 圓弧{math.degrees(angle_diff):.1f}度 (擴展+30度), "
-                   f"{len(detour_points)}個航點, 半徑={safe_radius:.1f}m")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("規律繞行: 圓弧%.1f度 (擴展+30度), %d個航點, 半徑=%.1fm",
+                        math.degrees(angle_diff), len(detour_points), safe_radius)
 
         return detour_points
     
@@ -536,29 +744,40 @@ class ObstacleManager:
     def point_in_polygon(self, point: Tuple[float, float], 
                         polygon: List[Tuple[float, float]]) -> bool:
         """射線法判斷點是否在多邊形內"""
-        lat, lon = point
-        n = len(polygon)
-        inside = False
-        
-        p1_lat, p1_lon = polygon[0]
-        for i in range(1, n + 1):
-            p2_lat, p2_lon = polygon[i % n]
-            if lon > min(p1_lon, p2_lon):
-                if lon <= max(p1_lon, p2_lon):
-                    if lat <= max(p1_lat, p2_lat):
-                        if p1_lon != p2_lon:
-                            xinters = (lon - p1_lon) * (p2_lat - p1_lat) / (p2_lon - p1_lon) + p1_lat
-                        if p1_lat == p2_lat or lat <= xinters:
-                            inside = not inside
-            p1_lat, p1_lon = p2_lat, p2_lon
-        
-        return inside
+        return bool(self.point_in_polygon_batch([point], polygon)[0])
+    
+    def point_in_polygon_batch(self, points, polygon: List[Tuple[float, float]]) -> np.ndarray:
+        """
+        射線法批次判斷多個點是否在多邊形內
+        
+        以 (K個點 × P條邊) 的NumPy廣播一次計算所有射線交叉
+        
+        返回: (K,) 布林陣列
+        """
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        poly = np.asarray(polygon, dtype=np.float64)
+        
+        # 邊 i：polygon[i] -> polygon[i+1]（最後一條邊回到起點）
+        p1_lat, p1_lon = poly[:, 0], poly[:, 1]
+        p2_lat, p2_lon = np.roll(p1_lat, -1), np.roll(p1_lon, -1)
+        
+        lat = pts[:, 0, None]
+        lon = pts[:, 1, None]
+        cond = ((lon > np.minimum(p1_lon, p2_lon)) &
+                (lon <= np.maximum(p1_lon, p2_lon)) &
+                (lat <= np.maximum(p1_lat, p2_lat)))
+        
+        # cond成立時兩端經度必不相等；垂直邊以1代替分母避免除以零
+        dlon = p2_lon - p1_lon
+        xinters = (lon - p1_lon) * (p2_lat - p1_lat) / np.where(dlon == 0, 1.0, dlon) + p1_lat
+        crossing = cond & ((p1_lat == p2_lat) | (lat <= xinters))
+        
+        return np.logical_xor.reduce(crossing, axis=1)
     
     def check_waypoint_collision(self, waypoint: Tuple[float, float]) -> bool:
         """檢查航點是否與任何障礙物衝突"""
         for obstacle in self.obstacles:
-            distance = self.calculate_distance(waypoint, obstacle.center)
-            if distance < obstacle.effective_radius:
+            if self._distance_sq_m2(waypoint, obstacle.center) < obstacle._r2:
                 return True
         return False
     
@@ -568,34 +787,87 @@ class ObstacleManager:
         檢查線段是否穿過障礙物
         返回: 與線段碰撞的障礙物列表
         """
-        colliding_obstacles = []
-        for obstacle in self.obstacles:
-            if self.line_intersects_circle(p1, p2, obstacle.center, 
-                                          obstacle.effective_radius):
-                colliding_obstacles.append(obstacle)
-        return colliding_obstacles
+        # AABB預篩：外接矩形不相交者必定不碰撞
+        seg_lat_min, seg_lat_max = min(p1[0], p2[0]), max(p1[0], p2[0])
+        seg_lon_min, seg_lon_max = min(p1[1], p2[1]), max(p1[1], p2[1])
+        candidates = [
+            i for i, o in enumerate(self.obstacles)
+            if not (seg_lat_max < o._aabb[0] or seg_lat_min > o._aabb[1] or
+                    seg_lon_max < o._aabb[2] or seg_lon_min > o._aabb[3])
+        ]
+        if not candidates:
+            return []
+        
+        indices = np.array(candidates, dtype=np.intp)
+        
+        hits = self._segment_hit_matrix(np.array([p1], dtype=np.float64),
+                                        np.array([p2], dtype=np.float64),
+                                        indices)[0]
+        return [self.obstacles[i] for i in indices[hits]]
     
-    def calculate_distance(self, p1: Tuple[float, float], 
-                          p2: Tuple[float, float]) -> float:
-        """計算兩點間距離（公尺）- 平面近似"""
-        lat1, lon1 = p1
-        lat2, lon2 = p2
+    def _segment_hit_matrix(self, starts: np.ndarray, ends: np.ndarray,
+                            indices: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        批次檢測多條線段與障礙物是否相交（NumPy廣播，直接讀取SoA陣列）
         
-        # 使用平均緯度計算經度縮放
-        avg_lat = (lat1 + lat2) / 2
-        cos_lat = math.cos(math.radians(avg_lat))
+        參數:
+            starts, ends: (S, 2) 線段起終點陣列 [lat, lon]
+            indices: 要檢測的障礙物索引，預設為全部
         
-        # 緯度和經度差值（度）
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
+        返回: (S, M) 布林矩陣，[i, j] 表示線段i穿過第j個被檢測的障礙物
+        """
+        self._ensure_index()
+        arr = self._obs_arr
+        cx, cy = arr['centers_lat'], arr['centers_lon']
+        radii, scale_x = arr['r_eff'], arr['r_lon']
+        if indices is not None:
+            cx, cy, radii, scale_x = cx[indices], cy[indices], radii[indices], scale_x[indices]
+        
+        if batch_line_circle_hit is not None:
+            return batch_line_circle_hit(
+                np.ascontiguousarray(np.hstack([starts, ends]), dtype=np.float64),
+                np.ascontiguousarray(np.column_stack([cx, cy])),
+                np.ascontiguousarray(radii), np.ascontiguousarray(scale_x),
+                self.earth_radius_m)
+        
+        if NUMBA_AVAILABLE:
+            return _segment_hit_kernel(
+                np.ascontiguousarray(starts[:, 0]), np.ascontiguousarray(starts[:, 1]),
+                np.ascontiguousarray(ends[:, 0]), np.ascontiguousarray(ends[:, 1]),
+                cx, cy, radii, scale_x, self.earth_radius_m,
+                np.zeros((len(starts), len(cx)), dtype=np.bool_))
+        
+        # 每個障礙物以自身中心緯度投影（與line_intersects_circle一致）
+        
+        x1 = (starts[:, 1, None] - cy) * scale_x
+        y1 = (starts[:, 0, None] - cx) * self.earth_radius_m
+        x2 = (ends[:, 1, None] - cy) * scale_x
+        y2 = (ends[:, 0, None] - cx) * self.earth_radius_m
         
-        # 轉換為公尺
-        dy = dlat * self.earth_radius_m
-        dx = dlon * self.earth_radius_m * cos_lat
+        dx = x2 - x1
+        dy = y2 - y1
+        dr2 = dx * dx + dy * dy
+        degenerate = dr2 == 0
         
-        # 計算距離
-        distance = math.sqrt(dx*dx + dy*dy)
-        return distance
+        # 圓心到線段的最短距離（退化線段以起點計算）
+        t = -(x1 * dx + y1 * dy) / np.where(degenerate, 1.0, dr2)
+        t = np.clip(t, 0.0, 1.0)
+        closest_x = x1 + t * dx
+        closest_y = y1 + t * dy
+        dist_sq = closest_x * closest_x + closest_y * closest_y
+        
+        r2 = radii * radii
+        return np.where(degenerate, dist_sq <= r2, dist_sq < r2)
+    
+    def calculate_distance(self, p1: Tuple[float, float], 
+                          p2: Tuple[float, float]) -> float:
+        """計算兩點間距離（公尺）- 平面近似"""
+        return _planar_distance(p1[0], p1[1], p2[0], p2[1], self.earth_radius_m)
+    
+    def _distance_sq_m2(self, p1: Tuple[float, float],
+                        p2: Tuple[float, float]) -> float:
+        """計算兩點間距離平方（公尺²）- 平面近似，用於距離比較"""
+        return _planar_distance_sq(p1[0], p1[1], p2[0], p2[1], self.earth_radius_m)
     
     def line_intersects_circle(self, p1: Tuple[float, float], 
                                p2: Tuple[float, float],
@@ -611,32 +883,10 @@ class ObstacleManager:
         cx, cy = center
         
         # 使用與waypoint_generator相同的座標轉換
-        cosLat0 = math.cos(math.radians(cx))
-        
-        def to_meters(lat, lon):
-            # 與waypoint_generator.py的project_and_rotate一致
-            x = (lon - cy) * self.earth_radius_m * cosLat0
-            y = (lat - cx) * self.earth_radius_m
-            return x, y
-
-        x1, y1 = to_meters(lat1, lon1)
-        x2, y2 = to_meters(lat2, lon2)
-        
-        dx = x2 - x1
-        dy = y2 - y1
-        dr2 = dx*dx + dy*dy
-        
-        if dr2 == 0:
-            # 線段退化為點
-            return (x1*x1 + y1*y1) <= radius_m*radius_m
-
-        # 計算圓心到線段的最短距離
-        t = -(x1*dx + y1*dy) / dr2
-        t = max(0, min(1, t))  # 限制在線段上
-        
-        closest_x = x1 + t * dx
-        closest_y = y1 + t * dy
+        r_lat = self.earth_radius_m
+        r_lon = r_lat * math.cos(math.radians(cx))
         
-        dist_sq = closest_x*closest_x + closest_y*closest_y
+        x1, y1 = _project(lat1, lon1, cx, cy, r_lon, r_lat)
+        x2, y2 = _project(lat2, lon2, cx, cy, r_lon, r_lat)
         
-        return dist_sq < (radius_m * radius_m)
\ No newline at end of file
+        return bool(_line_circle_hit(x1, y1, x2, y2, radius_m))
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""
+障礙物數學核心模組
+提供可選numba的njit包裝（未安裝numba時退回純Python）與圓周座標生成
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    # numba為可選依賴：未安裝時核心函數以純Python執行
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+METERS_PER_DEG = 111111.0  # 每度約111111公尺
+
+
+def circle_points(lat: float, lon: float, radius_m: float, inv_coslat: float,
+                  unit_cs: np.ndarray) -> np.ndarray:
+    """
+    生成圓周經緯度座標（NumPy向量化）
+
+    參數:
+        lat, lon: 圓心
+        radius_m: 半徑（公尺）
+        inv_coslat: 1 / cos(圓心緯度)，由呼叫端快取
+        unit_cs: 單位圓表 (N+1, 2)，欄位為 (cos, sin)
+
+    返回: (N+1, 2) 陣列（[lat, lon] 每列一點）
+    """
+    out = unit_cs * (radius_m / METERS_PER_DEG)
+    out[:, 1] *= inv_coslat
+    out[:, 0] += lat
+    out[:, 1] += lon
+    return out
@@ -5,11 +5,49 @@
 
 import tkinter as tk
 from tkinter import ttk
-from typing import Optional, Tuple, List
+from typing import Dict, Optional, Set, Tuple, List
+
+import numpy as np
+
 from obstacle_manager import ObstacleManager, Obstacle
+from obstacle_math import circle_points
+from ui_components import ModernSlider
 from logger_utils import logger
 
 
+def _precompute_unit_circle(num_points: int) -> np.ndarray:
+    """計算 num_points + 1 個等分角（首尾閉合）的單位圓表，形狀 (N+1, 2)，欄位為 (cos, sin)"""
+    angles = np.linspace(0.0, 2 * np.pi, num_points + 1)
+    return np.column_stack([np.cos(angles), np.sin(angles)])
+
+
+# 障礙物標記文字前綴（禁止圖標），半徑數值接在其後
+_MARKER_PREFIX = "🚫\n"
+
+# 圓形多邊形細節層級（LOD）：依半徑選用的點數
+_CIRCLE_LOD_LEVELS = (8, 12, 16, 24, 36)
+
+# 單位圓查找表：與圓心、半徑無關，所有障礙物共用；各LOD點數於載入時預先計算
+_UNIT_CIRCLE: Dict[int, np.ndarray] = {n: _precompute_unit_circle(n) for n in _CIRCLE_LOD_LEVELS}
+
+
+def _unit_circle(num_points: int) -> np.ndarray:
+    """取得單位圓表，非預設點數時計算一次後快取"""
+    table = _UNIT_CIRCLE.get(num_points)
+    if table is None:
+        table = _UNIT_CIRCLE[num_points] = _precompute_unit_circle(num_points)
+    return table
+
+
+def _circle_lod(radius_m: float) -> int:
+    """依半徑決定圓形點數：小障礙物只佔數個像素，不需36點"""
+    n = max(8, min(36, int(4 + radius_m)))
+    for level in _CIRCLE_LOD_LEVELS:
+        if level >= n:
+            return level
+    return _CIRCLE_LOD_LEVELS[-1]
+
+
 class ObstacleUIExtension:
     """障礙物UI擴展 - 完整修復版"""
     
@@ -28,6 +66,15 @@ class ObstacleUIExtension:
         
         # 保存原始地圖點擊處理器
         self.original_map_click_handler = None
+        
+        # 滑桿拖曳時合併顯示更新（after排程ID與待重繪的障礙物）
+        self._pending_update = None
+        self._pending_obstacle: Optional[Obstacle] = None
+        
+        # 視窗外剔除：被移出地圖重繪清單的障礙物（id(障礙物)）
+        self._culled: Set[int] = set()
+        self._pending_cull = None
+        self._bind_viewport_events()
     
     def add_obstacle_ui(self, parent_frame):
         """添加障礙物管理UI"""
@@ -43,7 +90,6 @@ class ObstacleUIExtension:
         
         # 半徑設定
         ttk.Label(obstacle_frame, text="障礙物半徑:").pack(anchor=tk.W, pady=(5, 0))
-        from ui_components import ModernSlider
         self.radius_slider = ModernSlider(
             obstacle_frame, label="半徑", from_=1, to=100,
             value=self.default_radius, resolution=0.5,
@@ -130,126 +176,198 @@ class ObstacleUIExtension:
         # 更新計數
         self.update_info()
         
-        logger.info(f"創建障礙物: 中心({lat:.6f}, {lon:.6f}), "
-                   f"半徑{self.default_radius}m")
+        logger.info("創建障礙物: 中心(%.6f, %.6f), 半徑%sm", lat, lon, self.default_radius)
     
     def create_obstacle_display(self, obstacle: Obstacle):
         """創建障礙物顯示（紫色系）"""
         try:
-            lat, lon = obstacle.center
-            
-            # 標記 - 紫色禁止圖標
-            obstacle.marker = self.app.map.set_marker(
-                lat, lon,
-                text=f"🚫\n{obstacle.radius:.1f}m",
-                marker_color_circle="#8B5CF6",  # 紫色
-                marker_color_outside="#8B5CF6"
-            )
-            
-            # 安全範圍圓圈（紫色外圈 - 淺紫色）
-            safe_points = self.generate_circle_points(lat, lon, obstacle.effective_radius, 36)
-            obstacle.safe_circle = self.app.map.set_polygon(
-                safe_points,
-                fill_color="#D8BFD8",  # 淺紫色（Thistle）
-                outline_color="#9370DB",  # 中紫色
-                border_width=2
-            )
-            
-            # 障礙物圓圈（紫色內圈 - 深紫色）
-            circle_points = self.generate_circle_points(lat, lon, obstacle.radius, 36)
-            obstacle.circle = self.app.map.set_polygon(
-                circle_points,
-                fill_color="#8B7AB8",  # 深紫色
-                outline_color="#6A5ACD",  # 藍紫色（SlateBlue）
-                border_width=3
-            )
-            
-            # 加入paths以支持縮放
-            self.app.paths.append(obstacle.safe_circle)
-            self.app.paths.append(obstacle.circle)
+            self._create_marker(obstacle)
+            self._create_circles(obstacle)
             
         except Exception as e:
             logger.error(f"創建障礙物顯示失敗: {e}")
     
+    def _create_marker(self, obstacle: Obstacle):
+        """創建障礙物標記 - 紫色禁止圖標"""
+        lat, lon = obstacle.center
+        obstacle.marker = self.app.map.set_marker(
+            lat, lon,
+            text=_MARKER_PREFIX + f"{obstacle.radius:.1f}m",
+            marker_color_circle="#8B5CF6",  # 紫色
+            marker_color_outside="#8B5CF6"
+        )
+    
+    def _create_circles(self, obstacle: Obstacle):
+        """創建安全範圍與障礙物本體圓形（紫色系）"""
+        self._culled.discard(id(obstacle))  # 新圓形為顯示狀態
+        
+        # 安全範圍以實心圓繪製（不挖空），本體圓疊於其上，圓周不會出現接縫線
+        obstacle.safe_circle = self.app.map.set_polygon(
+            self._circle_positions(obstacle, obstacle.effective_radius),
+            fill_color="#D8BFD8",  # 淺紫色（Thistle）
+            outline_color="#9370DB",  # 中紫色
+            border_width=2
+        )
+        obstacle.circle = self.app.map.set_polygon(
+            self._circle_positions(obstacle, obstacle.radius),
+            fill_color="#8B7AB8",  # 深紫色
+            outline_color="#6A5ACD",  # 藍紫色（SlateBlue）
+            border_width=3
+        )
+    
+    def _circle_positions(self, obstacle: Obstacle, radius_m: float) -> List[Tuple[float, float]]:
+        """計算障礙物中心指定半徑的圓形座標點（讀取障礙物快取的經度縮放係數）"""
+        lat, lon = obstacle.center
+        return self.generate_circle_points(lat, lon, radius_m, obstacle._inv_coslat,
+                                           _circle_lod(radius_m))
+    
+    @staticmethod
+    def _is_drawn(map_object) -> bool:
+        """地圖物件存在且尚未被刪除"""
+        return map_object is not None and not getattr(map_object, 'deleted', False)
+    
     def on_radius_change(self, value):
         """半徑改變"""
         self.default_radius = value
         
-        # 如果有選中的障礙物，更新它
-        if self.selected_obstacle:
-            self.selected_obstacle.radius = value
-            self.update_obstacle_display(self.selected_obstacle)
+        # 如果有選中的障礙物，更新它（滑桿停在同一刻度時數值未變，略過重繪）
+        obstacle = self.selected_obstacle
+        if obstacle and abs(value - obstacle.radius) >= 1e-9:
+            self.obstacle_manager.update_obstacle(obstacle, radius=value)
+            self.schedule_display_update(obstacle)
     
     def on_safe_distance_change(self, value):
         """安全距離改變"""
         self.default_safe_distance = value
         
-        if self.selected_obstacle:
-            self.selected_obstacle.safe_distance = value
-            self.update_obstacle_display(self.selected_obstacle)
+        obstacle = self.selected_obstacle
+        if obstacle and abs(value - obstacle.safe_distance) >= 1e-9:
+            self.obstacle_manager.update_obstacle(obstacle, safe_distance=value)
+            self.schedule_display_update(obstacle)
     
-    def update_obstacle_display(self, obstacle: Obstacle):
-        """更新障礙物顯示"""
+    def schedule_display_update(self, obstacle: Obstacle, delay_ms: int = 16):
+        """排程障礙物顯示更新，同一畫格（約60Hz）內的多次滑桿事件只重繪一次"""
         try:
-            # 刪除舊圓圈
-            if obstacle.circle:
-                if obstacle.circle in self.app.paths:
-                    self.app.paths.remove(obstacle.circle)
-                obstacle.circle.delete()
-            
-            if obstacle.safe_circle:
-                if obstacle.safe_circle in self.app.paths:
-                    self.app.paths.remove(obstacle.safe_circle)
-                obstacle.safe_circle.delete()
+            if self._pending_update is not None:
+                self.app.after_cancel(self._pending_update)
+        except Exception:
+            pass
+        
+        # 排程期間改選其他障礙物時，先完成前一個的重繪，避免其更新被丟棄
+        if self._pending_obstacle is not None and self._pending_obstacle is not obstacle:
+            self._flush_update()
+        
+        self._pending_obstacle = obstacle
+        self._pending_update = self.app.after(delay_ms, self._flush_update)
+    
+    def _flush_update(self):
+        """執行排程中的顯示更新（重繪排程時的障礙物，而非目前選取者）"""
+        obstacle = self._pending_obstacle
+        self._pending_update = None
+        self._pending_obstacle = None
+        # 排程後已被刪除的障礙物不再重建顯示
+        if obstacle is not None and obstacle in self.obstacle_manager.obstacles:
+            self.update_obstacle_display(obstacle)
+    
+    def _bind_viewport_events(self):
+        """
+        監聽地圖平移/縮放/尺寸變更事件（TkinterMapView未提供回呼，附加於畫布事件之後）
+        
+        程式呼叫移動地圖時不會觸發畫布事件，呼叫端需自行呼叫cull_offscreen_obstacles
+        """
+        try:
+            canvas = self.app.map.canvas
+            for sequence in ("<ButtonRelease-1>", "<B1-Motion>", "<MouseWheel>",
+                             "<Button-4>", "<Button-5>", "<Configure>"):
+                canvas.bind(sequence, lambda event: self.schedule_viewport_cull(), add="+")
+        except Exception as e:
+            logger.error(f"綁定地圖視窗事件失敗: {e}")
+    
+    def schedule_viewport_cull(self, delay_ms: int = 100):
+        """排程視窗外剔除；拖曳期間已有排程時不重複排程"""
+        if self._pending_cull is None:
+            self._pending_cull = self.app.after(delay_ms, self.cull_offscreen_obstacles)
+    
+    def _visible_bounds(self, margin: float = 0.5) -> Tuple[float, float, float, float]:
+        """
+        目前地圖可視範圍 (lat_min, lat_max, lon_min, lon_max)
+        
+        各方向外擴 margin 倍視窗大小，平移少量時不必立即恢復繪製
+        """
+        map_widget = self.app.map
+        lat_max, lon_min = map_widget.convert_canvas_coords_to_decimal_coords(0, 0)
+        lat_min, lon_max = map_widget.convert_canvas_coords_to_decimal_coords(
+            map_widget.canvas.winfo_width(), map_widget.canvas.winfo_height())
+        dlat = (lat_max - lat_min) * margin
+        dlon = (lon_max - lon_min) * margin
+        return lat_min - dlat, lat_max + dlat, lon_min - dlon, lon_max + dlon
+    
+    def cull_offscreen_obstacles(self):
+        """
+        隱藏視窗外障礙物的圓形畫布項目，回到視窗內時恢復
+        
+        隱藏項目仍由地圖更新座標，但Tk不繪製，畫布重繪成本隨可見障礙物數量增長
+        """
+        self._pending_cull = None
+        try:
+            canvas = self.app.map.canvas
+            lat_min, lat_max, lon_min, lon_max = self._visible_bounds()
             
-            # 更新標記文字
-            if obstacle.marker:
-                obstacle.marker.delete()
+            hide, show = [], []
+            for obstacle in self.obstacle_manager.obstacles:
+                o_lat_min, o_lat_max, o_lon_min, o_lon_max = obstacle._aabb
+                visible = (o_lat_max >= lat_min and o_lat_min <= lat_max and
+                           o_lon_max >= lon_min and o_lon_min <= lon_max)
+                culled = id(obstacle) in self._culled
+                if visible == culled:
+                    (show if visible else hide).append(obstacle)
             
-            lat, lon = obstacle.center
-            obstacle.marker = self.app.map.set_marker(
-                lat, lon,
-                text=f"🚫\n{obstacle.radius:.1f}m",
-                marker_color_circle="#8B5CF6",  # 紫色
-                marker_color_outside="#8B5CF6"
-            )
+            for obstacle in hide:
+                self._culled.add(id(obstacle))
+                for polygon in (obstacle.safe_circle, obstacle.circle):
+                    if self._is_drawn(polygon):
+                        canvas.itemconfigure(polygon.canvas_polygon, state='hidden')
             
-            # 重新創建圓圈（紫色系）
-            safe_points = self.generate_circle_points(lat, lon, obstacle.effective_radius, 36)
-            obstacle.safe_circle = self.app.map.set_polygon(
-                safe_points,
-                fill_color="#D8BFD8",  # 淺紫色（Thistle）
-                outline_color="#9370DB",  # 中紫色
-                border_width=2
-            )
+            for obstacle in show:
+                self._culled.discard(id(obstacle))
+                for polygon in (obstacle.safe_circle, obstacle.circle):
+                    if self._is_drawn(polygon):
+                        canvas.itemconfigure(polygon.canvas_polygon, state='normal')
             
-            circle_points = self.generate_circle_points(lat, lon, obstacle.radius, 36)
-            obstacle.circle = self.app.map.set_polygon(
-                circle_points,
-                fill_color="#8B7AB8",  # 深紫色
-                outline_color="#6A5ACD",  # 藍紫色（SlateBlue）
-                border_width=3
-            )
+        except Exception as e:
+            logger.error(f"剔除視窗外障礙物失敗: {e}")
+    
+    def update_obstacle_display(self, obstacle: Obstacle):
+        """更新障礙物顯示"""
+        try:
+            if self._is_drawn(obstacle.safe_circle) and self._is_drawn(obstacle.circle):
+                # 就地更新多邊形座標，重用既有畫布項目
+                obstacle.safe_circle.position_list = self._circle_positions(
+                    obstacle, obstacle.effective_radius)
+                obstacle.safe_circle.draw()
+                obstacle.circle.position_list = self._circle_positions(obstacle, obstacle.radius)
+                obstacle.circle.draw()
+            else:
+                # 圓形不存在或已被刪除，刪除殘留後重新創建
+                for polygon in (obstacle.safe_circle, obstacle.circle):
+                    if polygon:
+                        polygon.delete()
+                
+                self._create_circles(obstacle)
             
-            # 重新加入paths
-            self.app.paths.append(obstacle.safe_circle)
-            self.app.paths.append(obstacle.circle)
+            # 更新標記文字（僅在標記不存在時重建）
+            if self._is_drawn(obstacle.marker):
+                obstacle.marker.set_text(_MARKER_PREFIX + f"{obstacle.radius:.1f}m")
+            else:
+                self._create_marker(obstacle)
             
         except Exception as e:
             logger.error(f"更新障礙物顯示失敗: {e}")
     
-    def generate_circle_points(self, center_lat, center_lon, radius_m, num_points=36):
-        """生成圓形點（正確的公尺轉度數）"""
-        import math
-        points = []
-        
-        for i in range(num_points + 1):
-            angle = 2 * math.pi * i / num_points
-            dlat = (radius_m / 111111.0) * math.cos(angle)
-            dlon = (radius_m / 111111.0) * math.sin(angle) / math.cos(math.radians(center_lat))
-            points.append((center_lat + dlat, center_lon + dlon))
-        
-        return points
+    def generate_circle_points(self, center_lat, center_lon, radius_m, inv_coslat, num_points=36):
+        """生成圓形點（正確的公尺轉度數，地圖多邊形需要tuple列表）"""
+        points = circle_points(center_lat, center_lon, radius_m, inv_coslat, _unit_circle(num_points))
+        return list(map(tuple, points.tolist()))
     
     def toggle_delete_mode(self):
         """切換刪除模式"""
@@ -282,20 +400,16 @@ class ObstacleUIExtension:
         removed = self.obstacle_manager.remove_nearest_obstacle((lat, lon), threshold_m=100.0)
         
         if removed:
-            # 從paths移除
-            if removed.circle in self.app.paths:
-                self.app.paths.remove(removed.circle)
-            if removed.safe_circle in self.app.paths:
-                self.app.paths.remove(removed.safe_circle)
+            self._culled.discard(id(removed))
             
             # 刪除顯示
             try:
                 if removed.marker:
                     removed.marker.delete()
-                if removed.circle:
-                    removed.circle.delete()
                 if removed.safe_circle:
                     removed.safe_circle.delete()
+                if removed.circle:
+                    removed.circle.delete()
             except:
                 pass
             
@@ -303,32 +417,35 @@ class ObstacleUIExtension:
                 self.selected_obstacle = None
             
             self.update_info()
-            logger.info(f"已刪除障礙物: {removed.center}")
+            logger.info("已刪除障礙物: %s", removed.center)
         
         # 退出刪除模式
         self.exit_delete_mode()
     
     def clear_all_obstacles(self):
-        """清除所有障礙物"""
-        for obstacle in self.obstacle_manager.obstacles[:]:
-            # 從paths移除
-            if obstacle.circle in self.app.paths:
-                self.app.paths.remove(obstacle.circle)
-            if obstacle.safe_circle in self.app.paths:
-                self.app.paths.remove(obstacle.safe_circle)
-            
-            # 刪除顯示
+        """清除所有障礙物（一次過濾重建清單後再批次刪除畫布物件）"""
+        obstacles = self.obstacle_manager.obstacles
+        items = [item for obstacle in obstacles
+                 for item in (obstacle.marker, obstacle.safe_circle, obstacle.circle)
+                 if item is not None]
+        to_remove = {id(item) for item in items}
+        
+        # 地圖清單單次過濾重建，避免逐一list.remove造成O(n²)
+        map_widget = self.app.map
+        for attr in ('canvas_polygon_list', 'canvas_marker_list'):
+            lst = getattr(map_widget, attr, None)
+            if lst is not None:
+                lst[:] = [p for p in lst if id(p) not in to_remove]
+        
+        # 刪除顯示（物件已不在地圖清單中，delete只移除畫布項目）
+        for item in items:
             try:
-                if obstacle.marker:
-                    obstacle.marker.delete()
-                if obstacle.circle:
-                    obstacle.circle.delete()
-                if obstacle.safe_circle:
-                    obstacle.safe_circle.delete()
-            except:
-                pass
+                item.delete()
+            except Exception as e:
+                logger.error(f"刪除障礙物顯示失敗: {e}")
         
         self.obstacle_manager.clear_all()
+        self._culled.clear()
         self.selected_obstacle = None
         self.update_info()
         logger.info("已清除所有障礙物")
@@ -0,0 +1,30 @@
+"""
+障礙物管理器回歸測試
+執行: python -m pytest -q
+"""
+
+import math
+
+from obstacle_manager import ObstacleManager
+
+LAT0, LON0 = 23.7, 120.4
+COS_LAT0 = math.cos(math.radians(LAT0))
+
+
+def _to_latlon(x_m: float, y_m: float):
+    """以 (LAT0, LON0) 為原點的公尺座標轉經緯度（x向東、y向北）"""
+    return (LAT0 + y_m / 111111.0, LON0 + x_m / (111111.0 * COS_LAT0))
+
+
+def test_chained_detour_does_not_cross_next_obstacle():
+    """相鄰兩障礙物：第一個繞行之後接往第二個的線段不可進入第二個障礙物的安全範圍"""
+    manager = ObstacleManager()
+    manager.add_obstacle(_to_latlon(80, 0), 10, 1)
+    second = manager.add_obstacle(_to_latlon(104, 0), 10, 1)
+
+    path = manager.filter_waypoints_with_detour([_to_latlon(0, 0), _to_latlon(200, 0)])
+
+    assert len(path) > 2
+    for start, end in zip(path, path[1:]):
+        assert not manager.line_intersects_circle(start, end, second.center,
+                                                  second.effective_radius)